@@ -22,11 +22,56 @@ os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
 # Gemini API settings
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")  # Set your API key in .env file
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")  # Gemini model to use
+GEMINI_EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "models/embedding-001")  # Gemini embeddings model
+CONNECTION_CHECK_TTL = int(os.getenv("CONNECTION_CHECK_TTL", "300"))  # Seconds to reuse a Gemini connection check result
 
 # RAG settings
-CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
-CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+CHUNK_UNIT = os.getenv("CHUNK_UNIT", "tokens")  # Unit for CHUNK_SIZE/CHUNK_OVERLAP: "tokens" or "characters"
+CHUNK_ENCODING = os.getenv("CHUNK_ENCODING", "cl100k_base")  # tiktoken encoding used to count tokens
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "512"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "64"))
+PDF_SPLIT_WORKERS = int(os.getenv("PDF_SPLIT_WORKERS", str(os.cpu_count() or 1)))  # Processes used to parse PDFs and split their pages
+PDF_SPLIT_MIN_PAGES = int(os.getenv("PDF_SPLIT_MIN_PAGES", "32"))  # Smaller PDFs are split in-process
 TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "5"))  # Number of relevant chunks to retrieve
+MAX_HISTORY_TURNS = int(os.getenv("MAX_HISTORY_TURNS", "20"))  # User/assistant turns kept from the conversation history
+
+# Vector store settings
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")  # "flat", "hnsw" or "ivfpq"
+FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "4096"))  # Max IVF clusters for ivfpq; capped by training set size
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "64"))  # PQ sub-quantizers for ivfpq; must divide the embedding size
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))  # Bits per PQ code for ivfpq
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))  # IVF clusters probed per query
+FAISS_IVFPQ_REBUILD_THRESHOLD = int(os.getenv("FAISS_IVFPQ_REBUILD_THRESHOLD", "10000"))  # With ivfpq, a flat fallback index this large is rebuilt as IVF-PQ; 0 disables
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))  # Graph neighbours per node for hnsw
+FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))  # Build-time search depth for hnsw
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))  # Query-time search depth for hnsw
+VECTOR_STORE_MMAP = os.getenv("VECTOR_STORE_MMAP", "false").lower() in ("1", "true", "yes")  # Memory-map the index on load
+VECTOR_STORE_FLUSH_THRESHOLD = int(os.getenv("VECTOR_STORE_FLUSH_THRESHOLD", "1000"))  # Chunks added internally before the store is saved; indexing endpoints and exit save the rest
+
+# Embedding settings
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))  # Chunks per embedding request
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "5"))  # Embedding requests in flight at once
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))  # Attempts per batch on rate-limit errors
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBED_CACHE_PATH = VECTOR_STORE_PATH / "embed_cache.db"  # Content-hash cache of document embeddings
+INDEX_PIPELINE_QUEUE_SIZE = int(os.getenv("INDEX_PIPELINE_QUEUE_SIZE", "8"))  # Parsed EMBED_BATCH_SIZE batches buffered ahead of embedding
+
+# Multi-query retrieval settings
+MULTI_QUERY_ENABLED = os.getenv("MULTI_QUERY_ENABLED", "false").lower() in ("1", "true", "yes")
+MULTI_QUERY_COUNT = int(os.getenv("MULTI_QUERY_COUNT", "3"))  # Alternative queries generated per question
+RRF_K = int(os.getenv("RRF_K", "60"))  # Reciprocal Rank Fusion smoothing constant
+
+# Reranker settings
+USE_LLM_COMPRESSION = os.getenv("USE_LLM_COMPRESSION", "false").lower() in ("1", "true", "yes")  # LLM extractor over retrieved chunks
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")  # Cross-encoder used to rerank retrieved chunks
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", "torch")  # "torch" or "onnx"
+RERANK_OVERSAMPLE = int(os.getenv("RERANK_OVERSAMPLE", "6"))  # Candidates retrieved per final chunk when reranking
+
+# Query cache settings
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))  # Max cached queries before LRU eviction
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0.95"))  # Cosine similarity for a semantic hit
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))  # Query embeddings kept in memory
 
 # FastAPI settings
 API_TITLE = "LTE Document Chatbot API"
@@ -34,3 +79,4 @@ API_DESCRIPTION = "API for a RAG-based chatbot using Google Gemini for LTE docum
 API_VERSION = "0.1.0"
 PORT = int(os.getenv("PORT", "8000"))
 HOST = os.getenv("HOST", "0.0.0.0")
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read per chunk when streaming uploads to disk
@@ -1,44 +1,164 @@
 """
 Simple conversation handler for RAG-based chatbot.
 """
-from typing import Dict, List, Any, Optional
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import Dict, List, Any, AsyncIterator, MutableSequence, Optional, Tuple
 from langchain_core.messages import HumanMessage, AIMessage
 
-from rag_engine import RAGEngine
-from prompt_templates import create_rag_prompt, create_chat_prompt
+from config import (
+    MAX_HISTORY_TURNS,
+    MULTI_QUERY_ENABLED,
+    MULTI_QUERY_COUNT,
+    RRF_K
+)
+from deps import get_rag_engine
+from prompt_templates import create_rag_prompt, create_chat_prompt, create_multi_query_prompt
+from query_cache import QueryCache
 
-# Initialize the RAG engine
-rag_engine = RAGEngine()
+logger = logging.getLogger(__name__)
 
-# Get LLM from RAG engine
-llm = rag_engine.llm if rag_engine.api_key_valid else None
+# Cache retrieval results and answers for repeated or paraphrased questions
+query_cache = QueryCache()
 
-def process_message(message: str, conversation_history: Optional[List[Any]] = None) -> Dict[str, Any]:
+# Reply sent when the Gemini API key is missing or invalid
+API_KEY_ERROR_MESSAGE = (
+    "I'm sorry, but I can't process your request because the Gemini API key is missing or invalid. "
+    "Please set a valid API key in the .env file and restart the application. "
+)
+
+# Leading bullet or numbering on generated query lines
+LIST_MARKER_PATTERN = re.compile(r"^\s*(?:[-*]|\d+[.)])\s*")
+
+async def multi_query_retrieve(message: str, n: int = MULTI_QUERY_COUNT) -> List[Any]:
+    """
+    Retrieve context for a message and n LLM-generated rewrites of it, fused with RRF.
+
+    Args:
+        message: The user's message.
+        n: Number of alternative queries to generate.
+
+    Returns:
+        The fused list of relevant document chunks, best first.
+    """
+    rag_engine = get_rag_engine()
+
+    # Generate alternative phrasings of the question
+    queries = [message]
+    try:
+        prompt = create_multi_query_prompt(message, n)
+        response = await rag_engine.llm.ainvoke(prompt.to_messages())
+        rewrites = [LIST_MARKER_PATTERN.sub("", line).strip() for line in response.content.splitlines()]
+        queries.extend([rewrite for rewrite in rewrites if rewrite][:n])
+    except Exception:
+        logger.exception("Error generating alternative queries")
+
+    # Retrieve for every query concurrently
+    results = await asyncio.gather(*(rag_engine.aretrieve_relevant_context(query) for query in queries))
+
+    # Reciprocal Rank Fusion: score each chunk by 1 / (RRF_K + rank) summed over result lists
+    scores: Dict[Tuple[Any, Any, str], float] = {}
+    fused_docs: Dict[Tuple[Any, Any, str], Any] = {}
+    for docs in results:
+        for rank, doc in enumerate(docs, start=1):
+            key = (doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank)
+            fused_docs.setdefault(key, doc)
+
+    # Keep extra candidates when a reranker will trim them afterwards
+    top_k = rag_engine._search_k()
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [fused_docs[key] for key in ranked]
+
+async def retrieve_with_cache(message: str) -> Tuple[List[Any], List[str]]:
+    """
+    Retrieve relevant context for a message, reusing cached results when possible.
+
+    Args:
+        message: The user's message.
+
+    Returns:
+        A tuple of (relevant_docs, sources).
+    """
+    cached = query_cache.get(message)
+    if cached is not None:
+        return cached
+
+    rag_engine = get_rag_engine()
+
+    query_embedding = None
+    try:
+        # Shares the engine's query embedding cache, so retrieval below doesn't embed again
+        query_embedding = await asyncio.to_thread(rag_engine.embed_query, message)
+        cached = query_cache.get_similar(query_embedding)
+        if cached is not None:
+            return cached
+    except Exception:
+        logger.exception("Error embedding query for cache lookup")
+
+    if MULTI_QUERY_ENABLED:
+        relevant_docs = await multi_query_retrieve(message)
+    else:
+        relevant_docs = await rag_engine.aretrieve_relevant_context(message)
+    if rag_engine.reranker is not None:
+        # Cross-encoder inference is CPU-bound, keep it off the event loop
+        relevant_docs = await asyncio.to_thread(rag_engine.rerank, message, relevant_docs)
+    sources = rag_engine.get_sources_from_docs(relevant_docs)
+    if relevant_docs:
+        query_cache.put(message, relevant_docs, sources, embedding=query_embedding)
+    return relevant_docs, sources
+
+async def invoke_with_cache(llm: Any, prompt_messages: List[Any]) -> str:
+    """
+    Invoke the LLM, reusing the cached answer for an identical prompt.
+
+    Args:
+        llm: The chat model to invoke on a cache miss.
+        prompt_messages: The formatted prompt messages.
+
+    Returns:
+        The generated response text.
+    """
+    prompt_key = query_cache.prompt_key(prompt_messages)
+    content = query_cache.get_response(prompt_key)
+    if content is None:
+        content = (await llm.ainvoke(prompt_messages)).content
+        query_cache.put_response(prompt_key, content)
+    return content
+
+async def process_message(message: str, conversation_history: Optional[MutableSequence[Any]] = None) -> Dict[str, Any]:
     """
     Process a user message and generate a response.
 
+    The user message and the AI reply are appended to conversation_history
+    in place, and the same object is returned as "messages". Pass a
+    deque with a maxlen to keep a rolling window of recent turns.
+
     Args:
         message: The user's message.
-        conversation_history: Optional conversation history.
+        conversation_history: Optional conversation history, mutated in place.
 
     Returns:
         A dictionary containing the updated conversation state.
     """
     if conversation_history is None:
-        conversation_history = []
+        conversation_history = deque(maxlen=MAX_HISTORY_TURNS * 2)
+
+    # Get the shared RAG engine and its LLM
+    rag_engine = get_rag_engine()
+    llm = rag_engine.llm if rag_engine.api_key_valid else None
 
     # Add the user message to the history
     user_message = HumanMessage(content=message)
-    messages = conversation_history + [user_message]
+    messages = conversation_history
+    messages.append(user_message)
 
     # Check if API key is valid
     if not rag_engine.api_key_valid or llm is None:
-        error_message = (
-            "I'm sorry, but I can't process your request because the Gemini API key is missing or invalid. "
-            "Please set a valid API key in the .env file and restart the application. "
-        )
-        ai_message = AIMessage(content=error_message)
-        messages = messages + [ai_message]
+        ai_message = AIMessage(content=API_KEY_ERROR_MESSAGE)
+        messages.append(ai_message)
 
         return {
             "messages": messages,
@@ -50,8 +170,7 @@ def process_message(message: str, conversation_history: Optional[List[Any]] = No
 
     try:
         # Retrieve relevant context
-        relevant_docs = rag_engine.retrieve_relevant_context(message)
-        sources = rag_engine.get_sources_from_docs(relevant_docs)
+        relevant_docs, sources = await retrieve_with_cache(message)
 
         # Determine if we should use RAG based on whether we found relevant context
         use_rag = len(relevant_docs) > 0
@@ -62,7 +181,7 @@ def process_message(message: str, conversation_history: Optional[List[Any]] = No
             prompt = create_rag_prompt(relevant_docs, message)
 
             # Generate response
-            response = llm.invoke(prompt.to_messages())
+            response_content = await invoke_with_cache(llm, prompt.to_messages())
 
             # Add source information to the response
             sources_text = ""
@@ -70,19 +189,19 @@ def process_message(message: str, conversation_history: Optional[List[Any]] = No
                 sources_text = "\n\nSources: " + ", ".join(sources)
 
             # Create AI message with the response
-            ai_message = AIMessage(content=response.content + sources_text)
+            ai_message = AIMessage(content=response_content + sources_text)
         else:
             # Create chat prompt for general response
             prompt = create_chat_prompt(message)
 
             # Generate response
-            response = llm.invoke(prompt.to_messages())
+            response = await llm.ainvoke(prompt.to_messages())
 
             # Create AI message with the response
             ai_message = AIMessage(content=response.content)
 
         # Update messages
-        messages = messages + [ai_message]
+        messages.append(ai_message)
 
         # Return the updated state
         return {
@@ -95,7 +214,7 @@ def process_message(message: str, conversation_history: Optional[List[Any]] = No
     except Exception as e:
         error_message = f"I'm sorry, but an error occurred while processing your request: {str(e)}"
         ai_message = AIMessage(content=error_message)
-        messages = messages + [ai_message]
+        messages.append(ai_message)
 
         return {
             "messages": messages,
@@ -104,3 +223,73 @@ def process_message(message: str, conversation_history: Optional[List[Any]] = No
             "use_rag": False,
             "sources": []
         }
+
+async def process_message_stream(
+    message: str, conversation_history: Optional[MutableSequence[Any]] = None
+) -> AsyncIterator[str]:
+    """
+    Process a user message and stream the response as it is generated.
+
+    Like process_message, the user message and the complete AI reply are
+    appended to conversation_history in place once streaming finishes.
+
+    Args:
+        message: The user's message.
+        conversation_history: Optional conversation history, mutated in place.
+
+    Yields:
+        Chunks of the response text.
+    """
+    if conversation_history is None:
+        conversation_history = deque(maxlen=MAX_HISTORY_TURNS * 2)
+
+    # Get the shared RAG engine and its LLM
+    rag_engine = get_rag_engine()
+    llm = rag_engine.llm if rag_engine.api_key_valid else None
+
+    # Add the user message to the history
+    conversation_history.append(HumanMessage(content=message))
+
+    # Check if API key is valid
+    if not rag_engine.api_key_valid or llm is None:
+        conversation_history.append(AIMessage(content=API_KEY_ERROR_MESSAGE))
+        yield API_KEY_ERROR_MESSAGE
+        return
+
+    response_parts = []
+    try:
+        # Retrieve relevant context
+        relevant_docs, sources = await retrieve_with_cache(message)
+
+        if relevant_docs:
+            prompt_messages = create_rag_prompt(relevant_docs, message).to_messages()
+            prompt_key = query_cache.prompt_key(prompt_messages)
+            cached = query_cache.get_response(prompt_key)
+        else:
+            prompt_messages = create_chat_prompt(message).to_messages()
+            prompt_key = None
+            cached = None
+
+        # Stream the answer, or replay it in one piece from the response cache
+        if cached is not None:
+            response_parts.append(cached)
+            yield cached
+        else:
+            async for chunk in llm.astream(prompt_messages):
+                if chunk.content:
+                    response_parts.append(chunk.content)
+                    yield chunk.content
+            if prompt_key is not None:
+                query_cache.put_response(prompt_key, "".join(response_parts))
+
+        # Add source information to the response
+        if relevant_docs and sources:
+            sources_text = "\n\nSources: " + ", ".join(sources)
+            response_parts.append(sources_text)
+            yield sources_text
+    except Exception as e:
+        error_message = f"I'm sorry, but an error occurred while processing your request: {str(e)}"
+        response_parts.append(error_message)
+        yield error_message
+
+    conversation_history.append(AIMessage(content="".join(response_parts)))
@@ -0,0 +1,21 @@
+"""
+Shared service instances for the RAG chatbot.
+"""
+from functools import lru_cache
+
+from gemini_api import GeminiAPI
+
+
+@lru_cache(maxsize=1)
+def get_gemini_api() -> GeminiAPI:
+    """Get the shared Gemini API client."""
+    return GeminiAPI()
+
+
+@lru_cache(maxsize=1)
+def get_rag_engine():
+    """Get the shared RAG engine, creating it on first use."""
+    # Imported here because the RAG engine itself depends on get_gemini_api
+    from rag_engine import RAGEngine
+
+    return RAGEngine()
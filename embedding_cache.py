@@ -0,0 +1,108 @@
+"""
+Persistent content-hash cache for document embeddings.
+"""
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import EMBED_CACHE_PATH
+
+# SQLite's default limit on bound parameters per statement
+_SQLITE_MAX_PARAMS = 900
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches document vectors by content hash.
+
+    Re-indexing a PDF only sends chunks the cache has never seen to the
+    underlying model. Vectors are stored in SQLite as raw float32 bytes,
+    keyed by the model name and text, so switching models never serves
+    another model's vectors. Query embeddings are passed straight through.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, db_path: str = str(EMBED_CACHE_PATH)):
+        """
+        Initialize the cache.
+
+        Args:
+            embeddings: The embeddings model to cache.
+            model_name: Name of the embeddings model, part of every cache key.
+            db_path: Path to the SQLite cache database.
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def _key(self, text: str) -> str:
+        """Hash the model name and a text into the text's cache key."""
+        digest = hashlib.blake2b(digest_size=32)
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for the given keys."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique_keys), _SQLITE_MAX_PARAMS):
+                batch = unique_keys[i:i + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                )
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def _store(self, keys: List[str], vectors: List[List[float]]) -> None:
+        """Write newly computed vectors to the cache."""
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in zip(keys, vectors)]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+
+    def _split_misses(self, texts: List[str]):
+        """Return the keys, cached vectors, and the unique texts that still need embedding."""
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(keys)
+        misses: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                misses.setdefault(key, text)
+        return keys, cached, misses
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only calling the underlying model for cache misses."""
+        keys, cached, misses = self._split_misses(texts)
+        if misses:
+            vectors = self.embeddings.embed_documents(list(misses.values()))
+            self._store(list(misses), vectors)
+            cached.update(zip(misses, vectors))
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronously embed documents, only calling the underlying model for cache misses."""
+        keys, cached, misses = self._split_misses(texts)
+        if misses:
+            vectors = await self.embeddings.aembed_documents(list(misses.values()))
+            self._store(list(misses), vectors)
+            cached.update(zip(misses, vectors))
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query without caching."""
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Asynchronously embed a query without caching."""
+        return await self.embeddings.aembed_query(text)
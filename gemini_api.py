@@ -2,6 +2,7 @@
 Google Gemini API integration for the RAG chatbot.
 """
 import os
+import time
 from typing import List, Dict, Any, Optional
 
 import google.generativeai as genai
@@ -10,7 +11,7 @@ from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.language_models import BaseChatModel
 from langchain_core.embeddings import Embeddings
 
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from config import GEMINI_API_KEY, GEMINI_MODEL, GEMINI_EMBEDDING_MODEL, CONNECTION_CHECK_TTL
 
 class GeminiAPI:
     """Google Gemini API integration."""
@@ -19,6 +20,10 @@ class GeminiAPI:
         """Initialize the Gemini API."""
         self.api_key_valid = self._check_api_key()
 
+        # Cached result of the last connection probe
+        self._conn_ok = False
+        self._conn_checked_at = None
+
         if self.api_key_valid:
             try:
                 # Configure the Gemini API
@@ -26,7 +31,7 @@ class GeminiAPI:
                 
                 # Initialize the embeddings model
                 self.embeddings = GoogleGenerativeAIEmbeddings(
-                    model="models/embedding-001",
+                    model=GEMINI_EMBEDDING_MODEL,
                     google_api_key=GEMINI_API_KEY,
                 )
                 
@@ -95,17 +100,29 @@ class GeminiAPI:
             return f"Error generating response: {str(e)}"
 
     def test_connection(self) -> bool:
-        """Test the connection to the Gemini API."""
+        """
+        Test the connection to the Gemini API.
+
+        The probe is a tiny generate_content call whose result is cached for
+        CONNECTION_CHECK_TTL seconds, so repeated checks don't each cost an
+        API round trip.
+        """
         if not self.api_key_valid:
             return False
 
+        now = time.monotonic()
+        if self._conn_checked_at is not None and now - self._conn_checked_at < CONNECTION_CHECK_TTL:
+            return self._conn_ok
+
         try:
-            # Simple test query
-            response = self.generate_response([
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": "Hello, are you working?"}
-            ])
-            return "working" in response.lower() or "hello" in response.lower()
+            response = genai.GenerativeModel(GEMINI_MODEL).generate_content(
+                "ping",
+                generation_config={"max_output_tokens": 4}
+            )
+            self._conn_ok = len(response.text) > 0
         except Exception as e:
             print(f"Error testing Gemini API connection: {str(e)}")
-            return False
+            self._conn_ok = False
+
+        self._conn_checked_at = now
+        return self._conn_ok
@@ -1,27 +1,46 @@
 """
 FastAPI application for the RAG chatbot.
 """
+import asyncio
+import logging
 import os
+import shutil
 import tempfile
+from collections import deque
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
+import aiofiles
+import orjson
 
-from config import API_TITLE, API_DESCRIPTION, API_VERSION, PORT, HOST
-from rag_engine import RAGEngine
-from conversation_graph import process_message
+from config import API_TITLE, API_DESCRIPTION, API_VERSION, PORT, HOST, UPLOAD_CHUNK_SIZE, MAX_HISTORY_TURNS
+from deps import get_rag_engine
+from conversation_graph import process_message, process_message_stream, query_cache
 from langchain_core.messages import HumanMessage, AIMessage
 
-# Initialize the RAG engine
-rag_engine = RAGEngine()
+# Show the RAG engine's indexing and error logs alongside uvicorn's output
+logging.basicConfig(format="%(levelname)s:     %(name)s: %(message)s")
+logging.getLogger("rag_engine").setLevel(logging.INFO)
+logging.getLogger("conversation_graph").setLevel(logging.INFO)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the shared RAG engine at startup so the first request doesn't pay for it."""
+    # Done here rather than at import, since PDF worker processes re-import __main__
+    await asyncio.to_thread(get_rag_engine)
+    yield
 
 # Create the FastAPI app
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
     version=API_VERSION,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -36,11 +55,15 @@ app.add_middleware(
 # Define request and response models
 class MessageRequest(BaseModel):
     """Request model for chat messages."""
+    model_config = {"ser_json_bytes": "utf8"}
+
     message: str
     conversation_history: Optional[List[Dict[str, Any]]] = None
 
 class MessageResponse(BaseModel):
     """Response model for chat messages."""
+    model_config = {"ser_json_bytes": "utf8"}
+
     response: str
     sources: List[str] = []
 
@@ -53,6 +76,7 @@ class IndexResponse(BaseModel):
 @app.get("/")
 async def root():
     """Root endpoint."""
+    rag_engine = get_rag_engine()
     api_status = "API key is valid" if rag_engine.api_key_valid else "API key is missing or invalid"
     return {
         "message": "LTE Document Chatbot API is running",
@@ -60,10 +84,45 @@ async def root():
         "setup_instructions": "Set a valid Gemini API key in the .env file and restart the application if needed."
     }
 
-@app.post("/chat", response_model=MessageResponse)
+def _convert_history(conversation_history: Optional[List[Dict[str, Any]]]) -> deque:
+    """Convert the most recent turns of a request's conversation history to LangChain messages."""
+    messages = deque(maxlen=MAX_HISTORY_TURNS * 2)
+    if conversation_history:
+        for msg in conversation_history[-MAX_HISTORY_TURNS * 2:]:
+            if msg["role"] == "user":
+                messages.append(HumanMessage(content=msg["content"]))
+            elif msg["role"] == "assistant":
+                messages.append(AIMessage(content=msg["content"]))
+    return messages
+
+@app.post("/chat")
 async def chat(request: MessageRequest):
     """
-    Chat endpoint.
+    Streaming chat endpoint.
+
+    The response is a stream of Server-Sent Events. Each event carries a
+    JSON object with the next piece of the answer under "token", and the
+    stream ends with a "[DONE]" event.
+
+    Args:
+        request: The chat request containing the user message and conversation history.
+
+    Returns:
+        A streaming response with the assistant's answer.
+    """
+    conversation_history = _convert_history(request.conversation_history)
+
+    async def event_stream():
+        async for token in process_message_stream(request.message, conversation_history):
+            yield b"data: " + orjson.dumps({"token": token}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.post("/chat/sync", response_model=MessageResponse)
+async def chat_sync(request: MessageRequest):
+    """
+    Non-streaming chat endpoint.
 
     Args:
         request: The chat request containing the user message and conversation history.
@@ -71,17 +130,10 @@ async def chat(request: MessageRequest):
     Returns:
         The assistant's response.
     """
-    # Convert the conversation history to the correct format
-    conversation_history = []
-    if request.conversation_history:
-        for msg in request.conversation_history:
-            if msg["role"] == "user":
-                conversation_history.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                conversation_history.append(AIMessage(content=msg["content"]))
+    conversation_history = _convert_history(request.conversation_history)
 
     # Process the message
-    result = process_message(request.message, conversation_history)
+    result = await process_message(request.message, conversation_history)
 
     # Extract the response and sources
     messages = result["messages"]
@@ -102,6 +154,8 @@ async def upload_pdf(file: UploadFile = File(...)):
     Returns:
         A message indicating the result of the operation.
     """
+    rag_engine = get_rag_engine()
+
     # Check if API key is valid
     if not rag_engine.api_key_valid:
         raise HTTPException(
@@ -112,24 +166,29 @@ async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
 
-    # Save the uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-        temp_file.write(await file.read())
-        temp_file_path = temp_file.name
+    # Stream the upload into a private staging directory inside the PDF
+    # directory, so a partial or unindexable file never lands in PDF_DIR itself
+    pdf_dir = rag_engine.pdf_processor.PDF_DIR
+    filename = os.path.basename(file.filename)
+    staging_dir = tempfile.mkdtemp(prefix=".upload-", dir=pdf_dir)
+    staged_path = os.path.join(staging_dir, filename)
 
     try:
-        # Load and index the PDF
-        documents = rag_engine.pdf_processor.load_pdf(temp_file_path)
+        async with aiofiles.open(staged_path, 'wb') as pdf_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await pdf_file.write(chunk)
 
-        # Save the PDF to the PDF directory
-        pdf_path = os.path.join(rag_engine.pdf_processor.PDF_DIR, file.filename)
-        with open(pdf_path, 'wb') as pdf_file:
-            # Reset the file position to the beginning
-            await file.seek(0)
-            pdf_file.write(await file.read())
+        # Load and index the PDF
+        # Parsing and indexing block for a long time, so keep them off the event loop
+        documents = await asyncio.to_thread(rag_engine.pdf_processor.load_pdf, staged_path)
+        indexed = await asyncio.to_thread(rag_engine.index_documents, documents)
+        if documents and not indexed:
+            raise RuntimeError("the document chunks could not be added to the vector store")
+        query_cache.clear()
 
-        # Index the documents
-        rag_engine.index_documents(documents)
+        # Only keep the PDF once its chunks are saved to disk
+        await asyncio.to_thread(rag_engine.flush)
+        os.replace(staged_path, os.path.join(pdf_dir, filename))
 
         return IndexResponse(
             message=f"Successfully indexed {file.filename}",
@@ -138,8 +197,7 @@ async def upload_pdf(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error indexing PDF: {str(e)}")
     finally:
-        # Clean up the temporary file
-        os.unlink(temp_file_path)
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
 @app.post("/index-all-pdfs", response_model=IndexResponse)
 async def index_all_pdfs():
@@ -149,6 +207,8 @@ async def index_all_pdfs():
     Returns:
         A message indicating the result of the operation.
     """
+    rag_engine = get_rag_engine()
+
     # Check if API key is valid
     if not rag_engine.api_key_valid:
         raise HTTPException(
@@ -158,16 +218,15 @@ async def index_all_pdfs():
 
     try:
         # Count the documents before indexing
-        if not hasattr(rag_engine.vector_store, 'docstore') or not hasattr(rag_engine.vector_store.docstore, '_dict'):
-            raise HTTPException(status_code=500, detail="Vector store not properly initialized")
-
-        initial_doc_count = len(rag_engine.vector_store.docstore._dict)
+        initial_doc_count = rag_engine.indexed_count()
 
         # Index all PDFs
-        rag_engine.index_pdfs_from_directory()
+        await asyncio.to_thread(rag_engine.index_pdfs_from_directory)
+        await asyncio.to_thread(rag_engine.flush)
+        query_cache.clear()
 
         # Count the documents after indexing
-        final_doc_count = len(rag_engine.vector_store.docstore._dict)
+        final_doc_count = rag_engine.indexed_count()
         documents_indexed = final_doc_count - initial_doc_count
 
         return IndexResponse(
@@ -187,6 +246,8 @@ async def train_with_lte_pdf():
     Returns:
         A message indicating the result of the operation.
     """
+    rag_engine = get_rag_engine()
+
     # Check if API key is valid
     if not rag_engine.api_key_valid:
         raise HTTPException(
@@ -196,7 +257,7 @@ async def train_with_lte_pdf():
 
     try:
         # Check if LTE.pdf exists
-        if not hasattr(rag_engine, 'pdf_processor') or rag_engine.pdf_processor is None:
+        if rag_engine.pdf_processor is None:
             raise HTTPException(
                 status_code=500,
                 detail="PDF processor not initialized. Please check your Gemini API key."
@@ -210,17 +271,16 @@ async def train_with_lte_pdf():
             )
 
         # Count the documents before indexing
-        if not hasattr(rag_engine.vector_store, 'docstore') or not hasattr(rag_engine.vector_store.docstore, '_dict'):
-            raise HTTPException(status_code=500, detail="Vector store not properly initialized")
-
-        initial_doc_count = len(rag_engine.vector_store.docstore._dict)
+        initial_doc_count = rag_engine.indexed_count()
 
         # Load and index LTE.pdf
-        documents = rag_engine.pdf_processor.load_pdf(lte_pdf_path)
-        rag_engine.index_documents(documents)
+        documents = await asyncio.to_thread(rag_engine.pdf_processor.load_pdf, lte_pdf_path)
+        await asyncio.to_thread(rag_engine.index_documents, documents)
+        await asyncio.to_thread(rag_engine.flush)
+        query_cache.clear()
 
         # Count the documents after indexing
-        final_doc_count = len(rag_engine.vector_store.docstore._dict)
+        final_doc_count = rag_engine.indexed_count()
         documents_indexed = final_doc_count - initial_doc_count
 
         return IndexResponse(
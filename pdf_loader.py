@@ -1,28 +1,101 @@
 """
 PDF loading and processing module.
 """
+import itertools
+import multiprocessing
 import os
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Dict, Any, Optional
 
-from langchain_community.document_loaders import PyPDFLoader
+import pymupdf
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
 
-from config import CHUNK_SIZE, CHUNK_OVERLAP, PDF_DIR
-from gemini_api import GeminiAPI
+from config import (
+    CHUNK_UNIT,
+    CHUNK_ENCODING,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    PDF_DIR,
+    PDF_SPLIT_WORKERS,
+    PDF_SPLIT_MIN_PAGES
+)
+
+def _build_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Build the text splitter, measuring chunks in tokens unless CHUNK_UNIT says otherwise."""
+    if CHUNK_UNIT == "characters":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            length_function=len,
+        )
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name=CHUNK_ENCODING,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+
+# Text splitter owned by each split worker process, set by _init_split_worker
+_worker_splitter = None
+
+def _init_split_worker() -> None:
+    """Build the text splitter once per worker process instead of pickling it per task."""
+    global _worker_splitter
+    _worker_splitter = _build_text_splitter()
+
+# Process pool shared by every PDFProcessor, created on first use
+_split_pool = None
+_split_pool_lock = threading.Lock()
+
+def _get_split_pool() -> ProcessPoolExecutor:
+    """
+    Get the long-lived process pool used to parse and split PDFs.
+
+    Workers are started from a forkserver (spawn where that is unavailable)
+    rather than forked, since the pool is created from worker threads of a
+    process that also runs gRPC threads, and forking a multithreaded
+    process can deadlock the child.
+    """
+    global _split_pool
+    with _split_pool_lock:
+        if _split_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _split_pool = ProcessPoolExecutor(
+                max_workers=PDF_SPLIT_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_split_worker,
+            )
+        return _split_pool
+
+def _discard_split_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool whose worker died, so the next call starts a fresh one."""
+    global _split_pool
+    with _split_pool_lock:
+        if _split_pool is pool:
+            _split_pool = None
+    pool.shutdown(wait=False)
+
+def _extract_pages(file_path: str, start: int = 0, stop: Optional[int] = None) -> List[Document]:
+    """Extract page text with PyMuPDF, tagging each page with its source filename."""
+    source = os.path.basename(file_path)
+    with pymupdf.open(file_path) as pdf:
+        return [
+            Document(page_content=pdf[i].get_text("text"), metadata={"page": i, "source": source})
+            for i in range(start, pdf.page_count if stop is None else stop)
+        ]
+
+def _load_pages_in_worker(file_path: str, start: int = 0, stop: Optional[int] = None) -> List[Document]:
+    """Extract and split a range of pages of a PDF (all of it by default) inside a worker process."""
+    return _worker_splitter.split_documents(_extract_pages(file_path, start, stop))
 
 class PDFProcessor:
     """Class for loading and processing PDF documents."""
 
     def __init__(self):
         """Initialize the PDF processor."""
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP,
-            length_function=len,
-        )
-        # Initialize Gemini API for embeddings
-        gemini_api = GeminiAPI()
-        self.embeddings = gemini_api.get_embeddings()
+        self.text_splitter = _build_text_splitter()
         self.PDF_DIR = PDF_DIR
 
     def load_pdf(self, file_path: str) -> List[Dict[str, Any]]:
@@ -35,57 +108,122 @@ class PDFProcessor:
         Returns:
             List of document chunks with text and metadata.
         """
-        loader = PyPDFLoader(file_path)
-        documents = loader.load()
+        return list(itertools.chain.from_iterable(self._iter_pdf_page_chunks(file_path)))
+
+    def _iter_pdf_page_chunks(self, file_path: str) -> Iterator[List[Document]]:
+        """
+        Load a PDF file, yielding its chunks in page order as they become ready.
 
-        # Add source filename to metadata
-        for doc in documents:
-            doc.metadata["source"] = os.path.basename(file_path)
+        Large PDFs are fanned out across the process pool in page ranges, so
+        callers can start on the first pages while later ones are parsed.
 
-        # Split documents into chunks
-        chunks = self.text_splitter.split_documents(documents)
-        return chunks
+        Args:
+            file_path: Path to the PDF file.
 
-    def load_pdfs_from_directory(self) -> List[Dict[str, Any]]:
+        Yields:
+            Document chunks of a range of pages.
         """
-        Load all PDFs from the configured PDF directory.
+        with pymupdf.open(file_path) as pdf:
+            num_pages = pdf.page_count
+
+        if PDF_SPLIT_WORKERS <= 1 or num_pages < PDF_SPLIT_MIN_PAGES:
+            yield self.text_splitter.split_documents(_extract_pages(file_path))
+            return
+
+        step = max(1, num_pages // (PDF_SPLIT_WORKERS * 4))
+        starts = range(0, num_pages, step)
+        stops = [min(start + step, num_pages) for start in starts]
+        pool = _get_split_pool()
+        try:
+            yield from pool.map(_load_pages_in_worker, itertools.repeat(file_path), starts, stops)
+        except BrokenProcessPool:
+            _discard_split_pool(pool)
+            raise
+
+    def find_pdfs(self) -> List[str]:
+        """
+        Find the PDFs to index in the configured PDF directory.
         Specifically looks for LTE.pdf file for training.
 
         Returns:
-            List of document chunks from all PDFs.
+            Paths of the PDFs to process: just LTE.pdf if present, otherwise
+            every PDF in the directory.
         """
-        all_chunks = []
-
         # Check if directory exists
         if not os.path.exists(PDF_DIR):
             print(f"PDF directory {PDF_DIR} does not exist.")
-            return all_chunks
+            return []
+
+        # Collect PDF files in a single directory pass
+        lte_pdf_path = None
+        pdf_paths = []
+        with os.scandir(PDF_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith('.pdf'):
+                    if entry.name == "LTE.pdf":
+                        lte_pdf_path = entry.path
+                    pdf_paths.append(entry.path)
 
         # Look specifically for LTE.pdf first
-        lte_pdf_path = os.path.join(PDF_DIR, "LTE.pdf")
-        if os.path.exists(lte_pdf_path):
+        if lte_pdf_path is not None:
+            print(f"Found LTE.pdf, processing for training...")
+            return [lte_pdf_path]
+
+        print("LTE.pdf not found in the PDF directory. Please add this file for training.")
+
+        # Fallback: Process other PDF files if LTE.pdf is not available
+        print("Processing other available PDF files as fallback...")
+        return pdf_paths
+
+    def iter_pdf_chunks(self) -> Iterator[List[Document]]:
+        """
+        Load the PDFs from the configured PDF directory, yielding each file's chunks as it finishes.
+
+        Several files are parsed in parallel across processes; a single file
+        has its page ranges parsed in parallel instead and is yielded range
+        by range, so the first chunks are available before the whole file is parsed.
+
+        Yields:
+            Document chunks of one PDF, or of a range of its pages.
+        """
+        pdf_paths = self.find_pdfs()
+
+        if len(pdf_paths) <= 1 or PDF_SPLIT_WORKERS <= 1:
+            for path in pdf_paths:
+                name = os.path.basename(path)
+                num_chunks = 0
+                try:
+                    for chunks in self._iter_pdf_page_chunks(path):
+                        num_chunks += len(chunks)
+                        yield chunks
+                except Exception as e:
+                    print(f"Error processing {name}: {str(e)}")
+                    continue
+                print(f"Processed {name}: {num_chunks} chunks extracted")
+            return
+
+        pool = _get_split_pool()
+        futures = {pool.submit(_load_pages_in_worker, path): path for path in pdf_paths}
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
             try:
-                print(f"Found LTE.pdf, processing for training...")
-                chunks = self.load_pdf(lte_pdf_path)
-                all_chunks.extend(chunks)
-                print(f"Processed LTE.pdf: {len(chunks)} chunks extracted")
-                # If we found and processed LTE.pdf, return immediately
-                return all_chunks
+                chunks = future.result()
+            except BrokenProcessPool as e:
+                _discard_split_pool(pool)
+                print(f"Error processing {name}: {str(e)}")
+                continue
             except Exception as e:
-                print(f"Error processing LTE.pdf: {str(e)}")
-        else:
-            print("LTE.pdf not found in the PDF directory. Please add this file for training.")
-
-            # Fallback: Process other PDF files if LTE.pdf is not available
-            print("Processing other available PDF files as fallback...")
-            for filename in os.listdir(PDF_DIR):
-                if filename.lower().endswith('.pdf'):
-                    file_path = os.path.join(PDF_DIR, filename)
-                    try:
-                        chunks = self.load_pdf(file_path)
-                        all_chunks.extend(chunks)
-                        print(f"Processed {filename}: {len(chunks)} chunks extracted")
-                    except Exception as e:
-                        print(f"Error processing {filename}: {str(e)}")
-
-        return all_chunks
+                print(f"Error processing {name}: {str(e)}")
+                continue
+            print(f"Processed {name}: {len(chunks)} chunks extracted")
+            yield chunks
+
+    def load_pdfs_from_directory(self) -> List[Dict[str, Any]]:
+        """
+        Load all PDFs from the configured PDF directory.
+        Specifically looks for LTE.pdf file for training.
+
+        Returns:
+            List of document chunks from all PDFs.
+        """
+        return list(itertools.chain.from_iterable(self.iter_pdf_chunks()))
@@ -30,6 +30,20 @@ Context information is below:
 Given the context information and not prior knowledge, answer the question about LTE technology: {question}
 """
 
+# RAG prompt template, parsed once at import
+_RAG_CHAT_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(RAG_SYSTEM_PROMPT),
+    HumanMessagePromptTemplate.from_template(RAG_HUMAN_TEMPLATE)
+])
+
+def _format_doc(i: int, doc: Any) -> str:
+    """Format a single retrieved chunk for the RAG context."""
+    return "".join((
+        "Document ", str(i + 1),
+        " (Source: ", str(doc.metadata.get("source", "Unknown")), "): ",
+        doc.page_content
+    ))
+
 def create_rag_prompt(context: List[Dict[str, Any]], question: str) -> ChatPromptTemplate:
     """
     Create a prompt for RAG-based question answering.
@@ -42,19 +56,9 @@ def create_rag_prompt(context: List[Dict[str, Any]], question: str) -> ChatPromp
         A formatted ChatPromptTemplate.
     """
     # Format the context as a string
-    context_str = "\n\n".join([f"Document {i+1} (Source: {doc.metadata.get('source', 'Unknown')}): {doc.page_content}"
-                              for i, doc in enumerate(context)])
-
-    # Create the prompt template
-    system_message_prompt = SystemMessagePromptTemplate.from_template(RAG_SYSTEM_PROMPT)
-    human_message_prompt = HumanMessagePromptTemplate.from_template(RAG_HUMAN_TEMPLATE)
+    context_str = "\n\n".join(_format_doc(i, doc) for i, doc in enumerate(context))
 
-    chat_prompt = ChatPromptTemplate.from_messages([
-        system_message_prompt,
-        human_message_prompt
-    ])
-
-    return chat_prompt.format_prompt(context=context_str, question=question)
+    return _RAG_CHAT_PROMPT.format_prompt(context=context_str, question=question)
 
 # System prompt for conversational chat (when no context is available)
 CHAT_SYSTEM_PROMPT = """You are an LTE technology expert assistant powered by Google Gemini.
@@ -67,6 +71,12 @@ If the user asks about topics unrelated to LTE, politely redirect them to ask ab
 # Human message template for conversational chat
 CHAT_HUMAN_TEMPLATE = """{input}"""
 
+# Chat prompt template, parsed once at import
+_CHAT_CHAT_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(CHAT_SYSTEM_PROMPT),
+    HumanMessagePromptTemplate.from_template(CHAT_HUMAN_TEMPLATE)
+])
+
 def create_chat_prompt(input_text: str) -> ChatPromptTemplate:
     """
     Create a prompt for general conversational chat.
@@ -77,12 +87,25 @@ def create_chat_prompt(input_text: str) -> ChatPromptTemplate:
     Returns:
         A formatted ChatPromptTemplate.
     """
-    system_message_prompt = SystemMessagePromptTemplate.from_template(CHAT_SYSTEM_PROMPT)
-    human_message_prompt = HumanMessagePromptTemplate.from_template(CHAT_HUMAN_TEMPLATE)
+    return _CHAT_CHAT_PROMPT.format_prompt(input=input_text)
 
-    chat_prompt = ChatPromptTemplate.from_messages([
-        system_message_prompt,
-        human_message_prompt
-    ])
+# Prompt for rewriting a question into alternative search queries
+MULTI_QUERY_TEMPLATE = """Rewrite this as {n} alternative search queries, one per line: {question}"""
+
+# Multi-query prompt template, parsed once at import
+_MULTI_QUERY_PROMPT = ChatPromptTemplate.from_messages([
+    HumanMessagePromptTemplate.from_template(MULTI_QUERY_TEMPLATE)
+])
+
+def create_multi_query_prompt(question: str, n: int) -> ChatPromptTemplate:
+    """
+    Create a prompt asking for alternative phrasings of a search query.
 
-    return chat_prompt.format_prompt(input=input_text)
+    Args:
+        question: The user's question.
+        n: Number of alternative queries to request.
+
+    Returns:
+        A formatted ChatPromptTemplate.
+    """
+    return _MULTI_QUERY_PROMPT.format_prompt(question=question, n=n)
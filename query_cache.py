@@ -0,0 +1,163 @@
+"""
+In-memory query cache for the RAG chatbot.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import QUERY_CACHE_SIZE, QUERY_CACHE_SIMILARITY
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache key."""
+    return " ".join(query.lower().split())
+
+
+class QueryCache:
+    """
+    Two-level cache for retrieval results and generated answers.
+
+    Lookups first try an exact match on the normalized query. On a miss, the
+    query embedding is compared against the embeddings of recently cached
+    queries and a sufficiently similar entry is reused, so paraphrased
+    questions skip the vector store lookup as well.
+    """
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, threshold: float = QUERY_CACHE_SIMILARITY):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept before LRU eviction.
+            threshold: Minimum cosine similarity for a semantic hit.
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+
+        # Exact cache: normalized query -> (relevant_docs, sources)
+        self._exact: "OrderedDict[str, Tuple[List[Any], List[str]]]" = OrderedDict()
+
+        # Semantic cache: unit-norm query embeddings stored row-wise, with the
+        # normalized query for each row kept alongside for LRU bookkeeping
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: List[str] = []
+
+        # Response cache: prompt hash -> response text
+        self._responses: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, query: str) -> Optional[Tuple[List[Any], List[str]]]:
+        """Return cached (relevant_docs, sources) for an exact query match."""
+        key = normalize_query(query)
+        entry = self._exact.get(key)
+        if entry is not None:
+            self._exact.move_to_end(key)
+        return entry
+
+    def get_similar(self, embedding: Sequence[float]) -> Optional[Tuple[List[Any], List[str]]]:
+        """Return cached (relevant_docs, sources) for the most similar cached query."""
+        if self._matrix is None or not self._rows:
+            return None
+
+        query_vec = self._unit(embedding)
+        if query_vec is None or query_vec.shape[0] != self._matrix.shape[1]:
+            return None
+
+        similarities = self._matrix @ query_vec
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        key = self._rows[best]
+        self._exact.move_to_end(key)
+        return self._exact[key]
+
+    def put(
+        self,
+        query: str,
+        relevant_docs: List[Any],
+        sources: List[str],
+        embedding: Optional[Sequence[float]] = None,
+    ) -> None:
+        """
+        Cache the retrieval result for a query.
+
+        Args:
+            query: The user's query.
+            relevant_docs: Retrieved document chunks.
+            sources: Source filenames for the retrieved chunks.
+            embedding: Optional query embedding for semantic lookups.
+        """
+        key = normalize_query(query)
+        if key in self._exact:
+            self._exact.move_to_end(key)
+            self._exact[key] = (relevant_docs, sources)
+            return
+
+        self._exact[key] = (relevant_docs, sources)
+
+        query_vec = self._unit(embedding) if embedding is not None else None
+        if query_vec is not None:
+            if self._matrix is None:
+                self._matrix = query_vec[np.newaxis, :]
+            elif query_vec.shape[0] == self._matrix.shape[1]:
+                self._matrix = np.vstack([self._matrix, query_vec])
+            else:
+                query_vec = None
+            if query_vec is not None:
+                self._rows.append(key)
+
+        if len(self._exact) > self.max_size:
+            evicted, _ = self._exact.popitem(last=False)
+            self._drop_row(evicted)
+
+    def get_response(self, prompt_key: str) -> Optional[str]:
+        """Return a cached response for a prompt hash."""
+        response = self._responses.get(prompt_key)
+        if response is not None:
+            self._responses.move_to_end(prompt_key)
+        return response
+
+    def put_response(self, prompt_key: str, response: str) -> None:
+        """Cache a generated response under a prompt hash."""
+        self._responses[prompt_key] = response
+        self._responses.move_to_end(prompt_key)
+        if len(self._responses) > self.max_size:
+            self._responses.popitem(last=False)
+
+    @staticmethod
+    def prompt_key(messages: List[Any]) -> str:
+        """Hash a list of prompt messages into a response cache key."""
+        digest = hashlib.sha256()
+        for message in messages:
+            digest.update(message.type.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(str(message.content).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def clear(self) -> None:
+        """Drop all cached entries, e.g. after the vector store changes."""
+        self._exact.clear()
+        self._matrix = None
+        self._rows = []
+        self._responses.clear()
+
+    def _drop_row(self, key: str) -> None:
+        """Remove the embedding row belonging to an evicted query."""
+        try:
+            index = self._rows.index(key)
+        except ValueError:
+            return
+        del self._rows[index]
+        self._matrix = np.delete(self._matrix, index, axis=0) if self._rows else None
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit-norm float32 vector."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return None
+        return vec / norm
@@ -1,49 +1,169 @@
 """
 RAG (Retrieval Augmented Generation) engine implementation.
 """
+import asyncio
+import atexit
+import logging
 import os
-from typing import List, Dict, Any
-
+import pickle
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import LLMChainExtractor
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
 from config import (
     VECTOR_STORE_PATH,
-    TOP_K_RESULTS
+    GEMINI_EMBEDDING_MODEL,
+    TOP_K_RESULTS,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    RERANK_ENABLED,
+    RERANK_OVERSAMPLE,
+    USE_LLM_COMPRESSION,
+    FAISS_INDEX_TYPE,
+    FAISS_IVF_NLIST,
+    FAISS_PQ_M,
+    FAISS_PQ_NBITS,
+    FAISS_NPROBE,
+    FAISS_IVFPQ_REBUILD_THRESHOLD,
+    FAISS_HNSW_M,
+    FAISS_HNSW_EF_CONSTRUCTION,
+    FAISS_HNSW_EF_SEARCH,
+    VECTOR_STORE_MMAP,
+    EMBED_BATCH_SIZE,
+    EMBED_MAX_CONCURRENCY,
+    EMBED_MAX_RETRIES,
+    EMBED_CACHE_ENABLED,
+    INDEX_PIPELINE_QUEUE_SIZE,
+    VECTOR_STORE_FLUSH_THRESHOLD
 )
 from pdf_loader import PDFProcessor
-from gemini_api import GeminiAPI
+from embedding_cache import CachedEmbeddings
+from reranker import Reranker
+from deps import get_gemini_api
+
+logger = logging.getLogger(__name__)
+
+# Training points k-means needs per centroid to train FAISS quantizers well
+_MIN_POINTS_PER_CENTROID = 39
+
+def _is_rate_limit_error(error: BaseException) -> bool:
+    """Check whether an embedding error is a 429 / quota exhaustion from Gemini."""
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "ResourceExhausted" in message
+
+class _ReadWriteLock:
+    """
+    Lock shared by any number of readers or held by a single writer.
+
+    Waiting writers block new readers, so a steady stream of searches
+    cannot starve indexing.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        """Hold the lock for reading."""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively for writing."""
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
 
 class RAGEngine:
     """RAG engine for document retrieval and answer generation."""
 
-    def __init__(self):
-        """Initialize the RAG engine."""
+    def __init__(self, use_llm_compression: bool = USE_LLM_COMPRESSION):
+        """
+        Initialize the RAG engine.
+
+        Args:
+            use_llm_compression: Run retrieved chunks through an LLM extractor.
+                This costs one LLM call per chunk on every query, so it is off
+                by default; the cross-encoder reranker is the cheaper option.
+        """
+        self.use_llm_compression = use_llm_compression
+
+        # Interactive chat repeats queries often, so remember their embeddings
+        self._embed_query_cached = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._embed_query)
+
+        # Rerank oversampled retrieval results when enabled
+        self.reranker = Reranker() if RERANK_ENABLED else None
+
         # Initialize Gemini API
-        self.gemini_api = GeminiAPI()
+        self.gemini_api = get_gemini_api()
         self.api_key_valid = self.gemini_api.api_key_valid
 
+        # Indexing runs in worker threads, so serialize writes to the vector store
+        self._index_lock = threading.Lock()
+        # FAISS indexes are not safe to search while they are being modified,
+        # so searches share this lock and index mutations take it exclusively
+        self._search_lock = _ReadWriteLock()
+        self._index_mmapped = False
+
+        # Chunks added since the vector store was last written to disk
+        self._dirty_count = 0
+        atexit.register(self._flush_at_exit)
+
         if self.api_key_valid:
             try:
                 self.embeddings = self.gemini_api.get_embeddings()
+                if EMBED_CACHE_ENABLED:
+                    # Skip re-embedding chunks that were already embedded in a previous run
+                    self.embeddings = CachedEmbeddings(self.embeddings, GEMINI_EMBEDDING_MODEL)
                 self.llm = self.gemini_api.get_chat_model()
+
+                # Build the LLM-based compressor chain once rather than per query
+                self._compressor = LLMChainExtractor.from_llm(self.llm) if self.use_llm_compression else None
+
                 self.vector_store = None
-                self.retriever = None
                 self.pdf_processor = PDFProcessor()
 
                 # Load vector store if it exists
                 self._load_or_create_vector_store()
-            except Exception as e:
-                print(f"Error initializing RAG engine: {str(e)}")
+            except Exception:
+                logger.exception("Error initializing RAG engine")
                 self.api_key_valid = False
                 self.vector_store = None
-                self.retriever = None
                 self.pdf_processor = None
         else:
-            print("WARNING: No valid Gemini API key found. Limited functionality available.")
+            logger.warning("No valid Gemini API key found. Limited functionality available.")
             self.vector_store = None
-            self.retriever = None
             self.pdf_processor = None
 
     def _check_api_key(self):
@@ -51,124 +171,541 @@ class RAGEngine:
         return self.gemini_api.api_key_valid
 
     def _load_or_create_vector_store(self):
-        """Load existing vector store or create a new one."""
+        """Load the existing vector store; a new one is created on first indexing."""
         vector_store_file = os.path.join(VECTOR_STORE_PATH, "index.faiss")
 
         if os.path.exists(vector_store_file):
             try:
-                self.vector_store = FAISS.load_local(
-                    folder_path=str(VECTOR_STORE_PATH),
-                    embeddings=self.embeddings,
-                    index_name="index"
-                )
-                print(f"Loaded existing vector store from {VECTOR_STORE_PATH}")
-            except Exception as e:
-                print(f"Error loading vector store: {str(e)}")
+                if VECTOR_STORE_MMAP:
+                    self.vector_store = self._load_vector_store_mmap(vector_store_file)
+                else:
+                    # The store is written by this application, so its pickle is trusted
+                    self.vector_store = FAISS.load_local(
+                        folder_path=str(VECTOR_STORE_PATH),
+                        embeddings=self.embeddings,
+                        index_name="index",
+                        allow_dangerous_deserialization=True
+                    )
+                self._tune_index(self.vector_store.index)
+                logger.info("Loaded existing vector store from %s", VECTOR_STORE_PATH)
+            except Exception:
+                logger.exception("Error loading vector store")
                 self.vector_store = None
 
-        # If vector store couldn't be loaded, initialize with a dummy document
-        if self.vector_store is None:
-            # Create a dummy text to initialize the vector store
-            dummy_text = "This is a placeholder document to initialize the vector store."
-
-            # Initialize with the dummy document
-            self.vector_store = FAISS.from_texts(
-                texts=[dummy_text],
-                embedding=self.embeddings,
-                metadatas=[{"source": "initialization"}]
-            )
-            print("Created new vector store with placeholder document")
-
-        # Initialize the retriever
-        self._setup_retriever()
-
-    def _setup_retriever(self):
-        """Set up the document retriever with contextual compression."""
         if self.vector_store is None:
-            print("Warning: Vector store is not initialized. Retriever will not be set up.")
-            self.retriever = None
-            return
+            logger.info("No vector store yet; it will be created when documents are first indexed")
+
+    def _load_vector_store_mmap(self, vector_store_file: str) -> FAISS:
+        """
+        Load the vector store with its FAISS index memory-mapped read-only.
+
+        The OS pages in only the parts of the index that searches touch,
+        instead of reading the whole file into RAM up front.
+
+        Args:
+            vector_store_file: Path to the persisted FAISS index.
+
+        Returns:
+            The loaded vector store.
+        """
+        with open(os.path.join(VECTOR_STORE_PATH, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
 
-        base_retriever = self.vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": TOP_K_RESULTS}
+        index = faiss.read_index(vector_store_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        self._index_mmapped = True
+
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id
         )
 
-        # Create an LLM-based compressor for better context extraction
-        compressor = LLMChainExtractor.from_llm(self.llm)
+    def _ensure_writable_index(self) -> None:
+        """Replace a memory-mapped index with an in-memory copy before modifying it."""
+        if not self._index_mmapped:
+            return
+
+        # save_local rewrites index.faiss, which must not happen while it is mapped
+        index = faiss.read_index(os.path.join(VECTOR_STORE_PATH, "index.faiss"))
+        self._tune_index(index)
+        with self._search_lock.write():
+            self.vector_store.index = index
+        self._index_mmapped = False
+
+    def _create_vector_store(self, vectors: np.ndarray) -> FAISS:
+        """
+        Create an empty vector store sized for the given embeddings.
+
+        FAISS_INDEX_TYPE selects the index:
+        - "flat": exact search over FP32 vectors (default).
+        - "hnsw": HNSW graph for sub-linear approximate search.
+        - "ivfpq": IVF-PQ index whose 8-bit product-quantized codes take a
+          fraction of the memory of a flat index. It is trained on this first
+          batch of vectors, so it falls back to a flat index when the batch is
+          too small to train the quantizers well (about 39 * 2**nbits vectors).
+
+        Args:
+            vectors: The first batch of embeddings, shape (n, dim).
 
-        # Create a compression retriever
-        self.retriever = ContextualCompressionRetriever(
-            base_compressor=compressor,
-            base_retriever=base_retriever
+        Returns:
+            The new vector store.
+        """
+        dim = vectors.shape[1]
+        index = None
+
+        if FAISS_INDEX_TYPE == "hnsw":
+            index = faiss.index_factory(dim, f"HNSW{FAISS_HNSW_M}")
+            index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+            logger.info("Created HNSW vector store with M=%d", FAISS_HNSW_M)
+        elif FAISS_INDEX_TYPE == "ivfpq":
+            index = self._train_ivfpq_index(vectors)
+            if index is not None:
+                logger.info("Created IVF-PQ vector store with %d lists", index.nlist)
+            else:
+                logger.info("Not enough vectors (%d) to train an IVF-PQ index, using a flat index", len(vectors))
+
+        if index is None:
+            # Same index FAISS.from_embeddings builds for its default Euclidean distance
+            index = faiss.IndexFlatL2(dim)
+
+        self._tune_index(index)
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={}
         )
 
-    def index_documents(self, documents: List[Dict[str, Any]]) -> None:
+    def _add_vectors(self, vectors: np.ndarray, documents: List[Dict[str, Any]]) -> None:
+        """
+        Add embedded documents to the live vector store, blocking searches meanwhile.
+
+        Args:
+            vectors: C-contiguous float32 embeddings, shape (n, dim).
+            documents: The documents the vectors belong to, in the same order.
+        """
+        with self._search_lock.write():
+            self._append_vectors(self.vector_store, vectors, documents)
+
+    @staticmethod
+    def _append_vectors(vector_store: FAISS, vectors: np.ndarray, documents: List[Dict[str, Any]]) -> None:
+        """
+        Add embedded documents straight to a store's FAISS index and docstore.
+
+        The docstore and id mapping are written first, so every id the index
+        can return already resolves to a document.
+
+        Args:
+            vector_store: The store to add to.
+            vectors: C-contiguous float32 embeddings, shape (n, dim).
+            documents: The documents the vectors belong to, in the same order.
+        """
+        start = vector_store.index.ntotal
+        ids = [str(uuid.uuid4()) for _ in documents]
+
+        vector_store.docstore.add(dict(zip(ids, documents)))
+        vector_store.index_to_docstore_id.update(enumerate(ids, start))
+        vector_store.index.add(vectors)
+
+    def _train_ivfpq_index(self, vectors: np.ndarray) -> Any:
+        """
+        Build and train an (empty) IVF-PQ index on the given vectors.
+
+        Args:
+            vectors: Training vectors, shape (n, dim).
+
+        Returns:
+            The trained index, or None if there are too few vectors to train it.
+        """
+        num_vectors, dim = vectors.shape
+
+        # k-means wants ~39 training points per centroid, both for the IVF
+        # lists and for the 2**nbits centroids of each PQ sub-quantizer
+        nlist = min(FAISS_IVF_NLIST, num_vectors // _MIN_POINTS_PER_CENTROID)
+        if nlist < 1 or num_vectors < _MIN_POINTS_PER_CENTROID * 2 ** FAISS_PQ_NBITS or dim % FAISS_PQ_M != 0:
+            return None
+
+        index = faiss.index_factory(dim, f"IVF{nlist},PQ{FAISS_PQ_M}x{FAISS_PQ_NBITS}")
+        index.train(vectors)
+        self._tune_index(index)
+        return index
+
+    def _maybe_rebuild_as_ivfpq(self) -> None:
+        """
+        Migrate a flat index to IVF-PQ once it reaches FAISS_IVFPQ_REBUILD_THRESHOLD vectors.
+
+        Only applies when FAISS_INDEX_TYPE is "ivfpq", i.e. to stores that
+        started flat because their first batch was too small to train on;
+        flat and hnsw stores keep the index they were asked for.
+
+        Vectors are recovered from the flat index with reconstruct_n and
+        re-added in the same order, so the docstore id mapping stays valid.
+        """
+        if FAISS_INDEX_TYPE != "ivfpq" or FAISS_IVFPQ_REBUILD_THRESHOLD <= 0:
+            return
+
+        index = self.vector_store.index
+        if not isinstance(index, faiss.IndexFlat):
+            return
+        if index.ntotal < FAISS_IVFPQ_REBUILD_THRESHOLD:
+            return
+
+        vectors = index.reconstruct_n(0, index.ntotal)
+        new_index = self._train_ivfpq_index(vectors)
+        if new_index is None:
+            return
+
+        new_index.add(vectors)
+        with self._search_lock.write():
+            self.vector_store.index = new_index
+        logger.info("Rebuilt vector store as IVF-PQ with %d lists over %d vectors", new_index.nlist, new_index.ntotal)
+
+    def _tune_index(self, index: Any) -> None:
+        """Apply query-time search parameters to a FAISS index."""
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = FAISS_NPROBE
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+
+    def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Rerank retrieved documents with the cross-encoder, if enabled.
+
+        Args:
+            query: The user's query.
+            docs: Candidate document chunks.
+
+        Returns:
+            The TOP_K_RESULTS most relevant documents, best first.
+        """
+        if self.reranker is None:
+            return docs[:TOP_K_RESULTS]
+        docs = self.reranker.rerank(query, docs)
+        if self.reranker.failed:
+            # The model could not be loaded; stop oversampling for a reranker that won't run
+            self.reranker = None
+        return docs
+
+    @retry(
+        retry=retry_if_exception(_is_rate_limit_error),
+        wait=wait_exponential(multiplier=1, min=1, max=60),
+        stop=stop_after_attempt(EMBED_MAX_RETRIES),
+        reraise=True,
+    )
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch of texts, backing off exponentially on rate limits."""
+        return await self.embeddings.aembed_documents(texts)
+
+    async def _aembed_in_batches(self, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+        """
+        Embed texts in fixed-size batches, with up to EMBED_MAX_CONCURRENCY batches in flight.
+
+        Args:
+            texts: Texts to embed.
+            batch_size: Number of texts per embedding request.
+
+        Returns:
+            Embedding vectors in the same order as texts.
+        """
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results: List[List[List[float]]] = [None] * len(batches)
+        semaphore = asyncio.Semaphore(EMBED_MAX_CONCURRENCY)
+
+        async def embed(i: int, batch: List[str]) -> None:
+            async with semaphore:
+                # Write into a preallocated slot so completion order doesn't matter
+                results[i] = await self._aembed_batch(batch)
+
+        await asyncio.gather(*(embed(i, batch) for i, batch in enumerate(batches)))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def _embed_in_batches(self, texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+        """
+        Embed texts in concurrent batches from synchronous code.
+
+        Must not be called from a thread that is running an event loop;
+        the API endpoints call index_documents through asyncio.to_thread.
+
+        Args:
+            texts: Texts to embed.
+            batch_size: Number of texts per embedding request.
+
+        Returns:
+            Embedding vectors in the same order as texts.
+        """
+        if not texts:
+            return []
+        return asyncio.run(self._aembed_in_batches(texts, batch_size))
+
+    def index_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """
         Index documents into the vector store.
 
+        Safe to call from several threads; writes are serialized.
+
         Args:
             documents: List of document chunks to index.
+
+        Returns:
+            True if the documents were added to the vector store.
         """
+        with self._index_lock:
+            return self._index_documents(documents)
+
+    def _index_documents(self, documents: List[Dict[str, Any]]) -> bool:
+        """Index documents into the vector store. Caller must hold _index_lock."""
         if not self.api_key_valid:
-            print("API key is not valid. Cannot index documents.")
-            return
+            logger.warning("API key is not valid. Cannot index documents.")
+            return False
 
         if not documents:
-            print("No documents to index.")
-            return
+            logger.info("No documents to index.")
+            return False
 
+        try:
+            self._add_documents(documents)
+            self._commit_index(len(documents))
+            logger.info("Indexed %d document chunks", len(documents))
+            return True
+        except Exception:
+            logger.exception("Error indexing documents")
+            return False
+
+    def _add_documents(self, documents: List[Dict[str, Any]]) -> None:
+        """Embed documents and add them to the in-memory index. Caller must hold _index_lock."""
+        self._ensure_writable_index()
+
+        # Embed all chunks up front in concurrent batches, converting the
+        # result once into the float32 matrix FAISS works on
+        texts = [doc.page_content for doc in documents]
+        vectors = np.ascontiguousarray(self._embed_in_batches(texts), dtype=np.float32)
+        self._add_embedded(vectors, documents)
+
+    def _add_embedded(self, vectors: np.ndarray, documents: List[Dict[str, Any]]) -> None:
+        """Add embedded documents, creating the vector store first if needed. Caller must hold _index_lock."""
         if self.vector_store is None:
-            print("Vector store is not initialized. Cannot index documents.")
+            # The first indexed documents create the vector store, which is
+            # filled before searches can see it
+            logger.info("Creating new vector store")
+            vector_store = self._create_vector_store(vectors)
+            self._append_vectors(vector_store, vectors, documents)
+            self.vector_store = vector_store
             return
 
-        # Check if we only have the initialization document
-        has_only_placeholder = False
-        if hasattr(self.vector_store, 'docstore') and hasattr(self.vector_store.docstore, '_dict'):
-            docs = list(self.vector_store.docstore._dict.values())
-            if len(docs) == 1 and docs[0].metadata.get("source") == "initialization":
-                has_only_placeholder = True
+        self._add_vectors(vectors, documents)
 
-        try:
-            if has_only_placeholder:
-                # Create a new vector store with the real documents
-                print("Replacing placeholder with actual documents")
-                self.vector_store = FAISS.from_documents(
-                    documents=documents,
-                    embedding=self.embeddings
-                )
-            else:
-                # Add documents to existing vector store
-                self.vector_store.add_documents(documents)
+    def _vectors_needed_to_create(self) -> int:
+        """Number of vectors to collect before creating the store, so an ivfpq index can be trained."""
+        if FAISS_INDEX_TYPE == "ivfpq":
+            return _MIN_POINTS_PER_CENTROID * 2 ** FAISS_PQ_NBITS
+        return 1
 
-            # Save the updated vector store
-            self.vector_store.save_local(folder_path=str(VECTOR_STORE_PATH), index_name="index")
-            print(f"Indexed {len(documents)} document chunks")
+    def _commit_index(self, num_added: int) -> None:
+        """
+        Finish adding documents to the vector store. Caller must hold _index_lock.
+
+        The store is only written to disk once VECTOR_STORE_FLUSH_THRESHOLD
+        chunks have accumulated, since every save rewrites the whole index.
+        Callers that must report durable results call flush() afterwards.
+
+        Args:
+            num_added: Number of chunks added since the last commit.
+        """
+        self._maybe_rebuild_as_ivfpq()
 
-            # Re-setup the retriever with the updated vector store
-            self._setup_retriever()
-        except Exception as e:
-            print(f"Error indexing documents: {str(e)}")
+        self._dirty_count += num_added
+        if self._dirty_count >= VECTOR_STORE_FLUSH_THRESHOLD:
+            self._flush()
+
+    def flush(self) -> None:
+        """
+        Write any unsaved changes to the vector store to disk.
+
+        Raises:
+            Exception: If the vector store could not be saved.
+        """
+        with self._index_lock:
+            self._flush()
+
+    def _flush_at_exit(self) -> None:
+        """Flush unsaved changes on interpreter exit, logging instead of raising."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Error saving vector store")
+
+    def _flush(self) -> None:
+        """Write the vector store to disk if it has unsaved changes. Caller must hold _index_lock."""
+        if not self._dirty_count or self.vector_store is None:
+            return
+        self.vector_store.save_local(folder_path=str(VECTOR_STORE_PATH), index_name="index")
+        self._dirty_count = 0
 
     def index_pdfs_from_directory(self) -> None:
-        """Index all PDFs from the configured directory."""
+        """
+        Index all PDFs from the configured directory.
+
+        A background thread parses the PDFs in the shared process pool and
+        queues their chunks in EMBED_BATCH_SIZE batches, while this thread
+        embeds up to EMBED_MAX_CONCURRENCY batches at once and adds each to
+        the index as it completes, so parsing overlaps with embedding.
+        """
         if not self.api_key_valid:
-            print("API key is not valid. Cannot index PDFs.")
+            logger.warning("API key is not valid. Cannot index PDFs.")
             return
 
         if self.pdf_processor is None:
-            print("PDF processor is not initialized. Cannot index PDFs.")
+            logger.warning("PDF processor is not initialized. Cannot index PDFs.")
             return
 
-        try:
-            documents = self.pdf_processor.load_pdfs_from_directory()
-            self.index_documents(documents)
-        except Exception as e:
-            print(f"Error indexing PDFs from directory: {str(e)}")
+        batches: "queue.Queue[Any]" = queue.Queue(maxsize=INDEX_PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def produce() -> None:
+            pending: List[Any] = []
+            try:
+                for chunks in self.pdf_processor.iter_pdf_chunks():
+                    pending.extend(chunks)
+                    while len(pending) >= EMBED_BATCH_SIZE:
+                        if stop.is_set():
+                            return
+                        batches.put(pending[:EMBED_BATCH_SIZE])
+                        pending = pending[EMBED_BATCH_SIZE:]
+                if pending and not stop.is_set():
+                    batches.put(pending)
+            except Exception:
+                logger.exception("Error loading PDFs from directory")
+            finally:
+                batches.put(None)
+
+        producer = threading.Thread(target=produce, name="pdf-loader", daemon=True)
+        with self._index_lock:
+            initial_count = self.indexed_count()
+            producer.start()
+            try:
+                self._ensure_writable_index()
+                asyncio.run(self._aindex_queued_batches(batches))
+            except Exception:
+                logger.exception("Error indexing PDFs from directory")
+                # Keep draining so the producer sees the stop flag instead of blocking on a full queue
+                stop.set()
+                while producer.is_alive():
+                    try:
+                        batches.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+            finally:
+                producer.join()
+
+            indexed = self.indexed_count() - initial_count
+            if not indexed:
+                logger.info("No documents to index.")
+                return
+
+            try:
+                self._commit_index(indexed)
+                logger.info("Indexed %d document chunks", indexed)
+            except Exception:
+                logger.exception("Error saving vector store")
+
+    async def _aindex_queued_batches(self, batches: "queue.Queue[Any]") -> None:
+        """
+        Embed queued document batches concurrently and add them to the index. Caller must hold _index_lock.
+
+        FAISS writes happen on the event loop thread, i.e. the calling thread,
+        and go through _add_vectors, so they hold the search lock exclusively
+        while concurrent chat searches wait. A new store is only created
+        once enough vectors have arrived to train the configured index type,
+        and is filled before searches can see it.
+
+        Args:
+            batches: Queue of document batches, terminated by None.
+        """
+        semaphore = asyncio.Semaphore(EMBED_MAX_CONCURRENCY)
+        in_flight: Dict["asyncio.Task[List[List[float]]]", List[Any]] = {}
+        held_vectors: List[np.ndarray] = []
+        held_documents: List[Any] = []
+
+        def add(vectors: List[List[float]], documents: List[Any]) -> None:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            if self.vector_store is not None:
+                self._add_vectors(vectors, documents)
+                return
+
+            # Hold early batches back until there are enough to create the store
+            held_vectors.append(vectors)
+            held_documents.extend(documents)
+            if len(held_documents) >= self._vectors_needed_to_create():
+                flush_held()
+
+        def flush_held() -> None:
+            if held_documents:
+                self._add_embedded(np.concatenate(held_vectors), held_documents)
+                held_vectors.clear()
+                held_documents.clear()
+
+        def add_finished() -> None:
+            # Add every finished batch in one write, so concurrent searches
+            # are interrupted once per pass rather than once per batch
+            vectors: List[List[float]] = []
+            documents: List[Any] = []
+            for task in [task for task in in_flight if task.done()]:
+                vectors.extend(task.result())
+                documents.extend(in_flight.pop(task))
+            if documents:
+                add(vectors, documents)
+
+        while True:
+            # Only take another batch once an embedding request slot is free
+            await semaphore.acquire()
+            batch = await asyncio.to_thread(batches.get)
+            if batch is None:
+                semaphore.release()
+                break
+
+            task = asyncio.create_task(self._aembed_batch([doc.page_content for doc in batch]))
+            task.add_done_callback(lambda _: semaphore.release())
+            in_flight[task] = batch
+            add_finished()
+
+        if in_flight:
+            await asyncio.wait(in_flight)
+            add_finished()
+        flush_held()
+
+    def _embed_query(self, query: str) -> Tuple[float, ...]:
+        """Embed a query, returning an immutable vector safe to share from the cache."""
+        return tuple(self.embeddings.embed_query(query))
+
+    def embed_query(self, query: str) -> Tuple[float, ...]:
+        """
+        Embed a query, reusing the vector for recently seen queries.
+
+        Args:
+            query: The user's query.
+
+        Returns:
+            The query embedding.
+        """
+        return self._embed_query_cached(query)
+
+    def _search_k(self) -> int:
+        """Number of candidates to fetch, oversampled when a reranker will trim them."""
+        return TOP_K_RESULTS * RERANK_OVERSAMPLE if self.reranker is not None else TOP_K_RESULTS
+
+    def indexed_count(self) -> int:
+        """Return the number of chunks in the vector store."""
+        return self.vector_store.index.ntotal if self.vector_store is not None else 0
+
+    def _search_by_vector(self, query_vector: Tuple[float, ...]) -> List[Dict[str, Any]]:
+        """Search the vector store, holding off concurrent index writes."""
+        with self._search_lock.read():
+            return self.vector_store.similarity_search_by_vector(query_vector, k=self._search_k())
 
     def retrieve_relevant_context(self, query: str) -> List[Dict[str, Any]]:
         """
-        Retrieve relevant context for a query.
+        Retrieve relevant context for a query, reranked when a reranker is enabled.
 
         Args:
             query: The user's query.
@@ -177,24 +714,55 @@ class RAGEngine:
             List of relevant document chunks.
         """
         if not self.api_key_valid:
-            print("API key is not valid. Cannot retrieve context.")
+            logger.warning("API key is not valid. Cannot retrieve context.")
             return []
 
-        if not self.retriever:
-            print("Retriever not initialized.")
+        if self.vector_store is None:
+            # Nothing has been indexed yet
             return []
 
         try:
-            relevant_docs = self.retriever.get_relevant_documents(query)
+            relevant_docs = self._search_by_vector(self.embed_query(query))
+            if self.use_llm_compression:
+                # Compress outside the search lock; it makes one LLM call per chunk
+                relevant_docs = list(self._compressor.compress_documents(relevant_docs, query))
+
+            return self.rerank(query, relevant_docs)
+        except Exception:
+            logger.exception("Error retrieving relevant context")
+            return []
+
+    async def aretrieve_relevant_context(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant context for a query without blocking the event loop.
 
-            # Filter out the initialization document
-            relevant_docs = [doc for doc in relevant_docs
-                            if not (hasattr(doc, 'metadata') and
-                                   doc.metadata.get("source") == "initialization")]
+        Unlike retrieve_relevant_context, the oversampled candidates are not
+        reranked here, so callers can fuse several retrievals before reranking.
+
+        Args:
+            query: The user's query.
+
+        Returns:
+            List of relevant document chunks.
+        """
+        if not self.api_key_valid:
+            logger.warning("API key is not valid. Cannot retrieve context.")
+            return []
+
+        if self.vector_store is None:
+            # Nothing has been indexed yet
+            return []
+
+        try:
+            # The embedding call and FAISS search run in a worker thread
+            query_vector = await asyncio.to_thread(self.embed_query, query)
+            relevant_docs = await asyncio.to_thread(self._search_by_vector, query_vector)
+            if self.use_llm_compression:
+                relevant_docs = list(await self._compressor.acompress_documents(relevant_docs, query))
 
             return relevant_docs
-        except Exception as e:
-            print(f"Error retrieving relevant context: {str(e)}")
+        except Exception:
+            logger.exception("Error retrieving relevant context")
             return []
 
     def get_sources_from_docs(self, docs: List[Dict[str, Any]]) -> List[str]:
@@ -211,12 +779,10 @@ class RAGEngine:
             return []
 
         sources = []
-        try:
-            for doc in docs:
-                if hasattr(doc, 'metadata') and "source" in doc.metadata and doc.metadata["source"] not in sources:
-                    # Skip the initialization placeholder document
-                    if doc.metadata["source"] != "initialization":
-                        sources.append(doc.metadata["source"])
-        except Exception as e:
-            print(f"Error extracting sources from documents: {str(e)}")
+        seen = set()
+        for doc in docs:
+            source = doc.metadata.get("source")
+            if source and source not in seen:
+                seen.add(source)
+                sources.append(source)
         return sources
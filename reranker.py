@@ -0,0 +1,58 @@
+"""
+Cross-encoder reranking for retrieved document chunks.
+"""
+from typing import Any, List
+
+import numpy as np
+
+from config import TOP_K_RESULTS, RERANK_MODEL, RERANK_BACKEND
+
+class Reranker:
+    """Cross-encoder reranker for retrieved document chunks."""
+
+    def __init__(self, model_name: str = RERANK_MODEL, backend: str = RERANK_BACKEND):
+        """Initialize the reranker. The model is loaded lazily on first use."""
+        self.model_name = model_name
+        self.backend = backend
+        self.model = None
+        # Set once the model fails to load, so later queries don't retry the load
+        self.failed = False
+
+    def _load_model(self):
+        """Load the cross-encoder model."""
+        if self.model is None:
+            from sentence_transformers import CrossEncoder
+
+            self.model = CrossEncoder(self.model_name, backend=self.backend)
+        return self.model
+
+    def rerank(self, query: str, docs: List[Any], top_k: int = TOP_K_RESULTS) -> List[Any]:
+        """
+        Rerank documents by cross-encoder relevance to the query.
+
+        Args:
+            query: The user's query.
+            docs: Candidate document chunks.
+            top_k: Number of documents to keep.
+
+        Returns:
+            The top_k most relevant documents, best first.
+        """
+        if len(docs) <= 1 or self.failed:
+            return docs[:top_k]
+
+        try:
+            model = self._load_model()
+        except Exception as e:
+            print(f"Error loading reranker model {self.model_name}, reranking disabled: {str(e)}")
+            self.failed = True
+            return docs[:top_k]
+
+        try:
+            scores = model.predict([(query, doc.page_content) for doc in docs])
+        except Exception as e:
+            print(f"Error reranking documents: {str(e)}")
+            return docs[:top_k]
+
+        order = np.argsort(scores)[::-1][:top_k]
+        return [docs[i] for i in order]
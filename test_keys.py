@@ -0,0 +1,70 @@
+"""
+Test script to verify the Gemini and OpenAI API keys are working.
+
+Both providers are probed concurrently; a provider whose key is not set is skipped.
+"""
+import asyncio
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+PROMPT = "Hello, are you working?"
+
+async def probe_gemini():
+    """Send a test prompt to Gemini, or return None if no key is set."""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key or len(api_key) < 20:
+        return None
+
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel('gemini-1.5-flash')
+    response = await model.generate_content_async(PROMPT)
+    return response.text
+
+async def probe_openai():
+    """Send a test prompt to OpenAI, or return None if no key is set."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or api_key.startswith("sk-your-actual"):
+        return None
+
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=api_key)
+    response = await client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": PROMPT}
+        ]
+    )
+    return response.choices[0].message.content
+
+async def main():
+    """Probe all providers at once and report each result."""
+    providers = ["Gemini", "OpenAI"]
+    results = await asyncio.gather(probe_gemini(), probe_openai(), return_exceptions=True)
+
+    working = 0
+    for provider, result in zip(providers, results):
+        if result is None:
+            print(f"{provider}: skipped, no API key set in the .env file")
+        elif isinstance(result, BaseException):
+            print(f"{provider}: ERROR: Failed to connect: {str(result)}")
+            print("Please check your API key and internet connection.")
+        else:
+            working += 1
+            print(f"{provider}: API Key is working! Response:")
+            print(result)
+
+    if not working:
+        print("ERROR: No working API key found. Please set a valid key in the .env file")
+        exit(1)
+
+    print("\nYou can now run the main application with: python main.py")
+
+if __name__ == "__main__":
+    asyncio.run(main())